@@ -1,23 +1,114 @@
+from collections import Counter
+from functools import lru_cache
+
 import numpy as np
 import pandas as pd
 from pandas.tseries.frequencies import to_offset
+from scipy import sparse
 from sklearn.metrics import r2_score
 
 # handle optional dependency
 try:
     import hierarchicalforecast  # noqa: F401
     from hierarchicalforecast.core import HierarchicalReconciliation
-    from hierarchicalforecast.methods import BottomUp
-    from hierarchicalforecast.utils import aggregate
 except (ImportError, SystemError):
     HierarchicalReconciliation = None
-    BottomUp = None
-    aggregate = None
+
+# handle optional dependency
+try:
+    from numba import njit
+except (ImportError, SystemError):
+    njit = None
 
 from mindsdb.utilities import log
 
 DEFAULT_FREQUENCY = "D"
-DEFAULT_RECONCILER = BottomUp
+
+_DAY_NS = 86_400_000_000_000
+
+
+def _resample_groups_numba(timestamps, target, group_ids, bucket_ns, n_groups):
+    """Bucket-averages each group's target over fixed-size time buckets in one linear scan.
+
+    Mirrors groupby + resample + mean for epoch-aligned bucket widths: every bucket
+    between a group's first and last observation is emitted, empty ones as NaN.
+    """
+    n = timestamps.shape[0]
+    buckets = np.empty(n, np.int64)
+    group_min = np.full(n_groups, np.iinfo(np.int64).max, np.int64)
+    group_max = np.full(n_groups, np.iinfo(np.int64).min, np.int64)
+    for i in range(n):
+        bucket = timestamps[i] // bucket_ns
+        buckets[i] = bucket
+        group = group_ids[i]
+        if bucket < group_min[group]:
+            group_min[group] = bucket
+        if bucket > group_max[group]:
+            group_max[group] = bucket
+    offsets = np.zeros(n_groups + 1, np.int64)
+    for group in range(n_groups):
+        offsets[group + 1] = offsets[group] + (group_max[group] - group_min[group] + 1)
+    total = offsets[n_groups]
+    sums = np.zeros(total, np.float64)
+    counts = np.zeros(total, np.int64)
+    for i in range(n):
+        if np.isnan(target[i]):  # mean() skips NaN, so the kernel must too
+            continue
+        group = group_ids[i]
+        out_idx = offsets[group] + (buckets[i] - group_min[group])
+        sums[out_idx] += target[i]
+        counts[out_idx] += 1
+    out_ts = np.empty(total, np.int64)
+    out_target = np.empty(total, np.float64)
+    out_group = np.empty(total, np.int64)
+    for group in range(n_groups):
+        for j in range(group_max[group] - group_min[group] + 1):
+            out_idx = offsets[group] + j
+            out_ts[out_idx] = (group_min[group] + j) * bucket_ns
+            out_group[out_idx] = group
+            out_target[out_idx] = sums[out_idx] / counts[out_idx] if counts[out_idx] > 0 else np.nan
+    return out_ts, out_target, out_group
+
+
+if njit is not None:
+    _resample_groups_numba = njit(cache=True)(_resample_groups_numba)
+
+
+def _resample_groups(df, settings_dict, freq):
+    """Resamples every group of df to the given frequency, averaging the target.
+
+    Fixed-width frequencies that divide a day (e.g. hours, minutes) with a numeric
+    target go through the compiled numba kernel; anchored or calendar frequencies
+    fall back to the pandas groupby + resample engine.
+    """
+    group_by, order_by, target = settings_dict["group_by"], settings_dict["order_by"], settings_dict["target"]
+    bucket_ns = None
+    if njit is not None and pd.api.types.is_numeric_dtype(df[target]):
+        try:
+            bucket_ns = to_offset(freq).nanos  # raises for non-fixed frequencies like M or Q
+        except ValueError:
+            bucket_ns = None
+    # NaN group keys force the pandas path: ngroup() marks them with NaN codes the
+    # kernel cannot take, and groupby drops those rows the way the old loop did
+    if bucket_ns is not None and _DAY_NS % bucket_ns == 0 and not df[group_by].isna().any().any():
+        timestamps = pd.to_datetime(df[order_by]).to_numpy(dtype="datetime64[ns]").view("i8")
+        group_ids = df.groupby(group_by, sort=False).ngroup().to_numpy()
+        group_keys = df[group_by].drop_duplicates()
+        out_ts, out_target, out_group = _resample_groups_numba(
+            timestamps, df[target].to_numpy(np.float64), group_ids, bucket_ns, len(group_keys)
+        )
+        resampled = group_keys.iloc[out_group].reset_index(drop=True)
+        resampled[order_by] = out_ts.view("datetime64[ns]")
+        resampled[target] = out_target
+    else:
+        resampled = (
+            df.set_index(pd.to_datetime(df[order_by]))
+            .groupby(group_by, sort=False)[target]
+            .resample(freq)
+            .mean()
+            .reset_index()
+        )
+    return resampled.reindex(columns=df.columns)
 
 
 def transform_to_nixtla_df(df, settings_dict, exog_vars=[]):
@@ -32,26 +123,53 @@ def transform_to_nixtla_df(df, settings_dict, exog_vars=[]):
     You can optionally include exogenous regressors after these three columns, but
     they must be numeric.
     """
-    nixtla_df = df.copy()
+    # Fast path: at inference time the frame may already carry the trained schema.
+    # It must actually be the configured schema — merely having columns named
+    # unique_id/ds/y next to the configured ones still needs the full transformation.
+    already_nixtla_schema = (
+        {"unique_id", "ds", "y"}.issubset(df.columns)
+        and (settings_dict["order_by"] == "ds" or settings_dict["order_by"] not in df.columns)
+        and (settings_dict["target"] == "y" or settings_dict["target"] not in df.columns)
+        and all(col == "unique_id" or col not in df.columns for col in settings_dict["group_by"])
+    )
+    if already_nixtla_schema and pd.api.types.is_datetime64_any_dtype(df["ds"]):
+        try:
+            freq_delta = pd.Timedelta(to_offset(settings_dict["frequency"]).nanos, unit="ns")
+        except ValueError:
+            freq_delta = None  # calendar frequencies have no fixed delta; run the full pipeline
+        if freq_delta is not None:
+            # every within-series step must equal the requested delta exactly: a series
+            # with an interior gap still needs the resample below to fill its NaN bucket
+            new_series = ~df["unique_id"].eq(df["unique_id"].shift())
+            evenly_spaced = df["ds"].diff().eq(freq_delta) | new_series
+            if evenly_spaced.all():
+                result_columns = {
+                    "unique_id": df["unique_id"].astype("category"),
+                    "ds": df["ds"],
+                    "y": df["y"],
+                }
+                for col in exog_vars:
+                    result_columns[col] = df[col]
+                return pd.DataFrame(result_columns)
+
+    # Work on the input frame directly: every mutating step below either already returns
+    # a new frame or writes to one, so there is no need to copy the whole input up front.
+    nixtla_df = df
 
     # Resample every group
     freq = settings_dict['frequency']
-    resampled_df = pd.DataFrame(columns=nixtla_df.columns)
     if settings_dict["group_by"] and settings_dict["group_by"] != ['__group_by']:
-        for group, groupdf in nixtla_df.groupby(by=settings_dict["group_by"]):
-            groupdf.index = pd.to_datetime(groupdf.pop(settings_dict["order_by"]))
-            resampled_groupdf = pd.DataFrame(groupdf[settings_dict['target']].resample(freq).mean())
-            for k, v in zip(settings_dict["group_by"], group):
-                resampled_groupdf[k] = v
-            resampled_groupdf = resampled_groupdf.reset_index()
-            resampled_df = pd.concat([resampled_df, resampled_groupdf])
-        nixtla_df = resampled_df
+        nixtla_df = _resample_groups(df, settings_dict, freq)
 
     # Transform group columns into single unique_id column
     if len(settings_dict["group_by"]) > 1:
-        for col in settings_dict["group_by"]:
-            nixtla_df[col] = nixtla_df[col].astype(str)
-        nixtla_df["unique_id"] = nixtla_df[settings_dict["group_by"]].agg("/".join, axis=1)
+        # fixed-width unicode arrays stringify and join the group columns entirely in C,
+        # avoiding the per-element str() coercion of astype(str) on object columns
+        group_arrays = [np.asarray(nixtla_df[col], dtype="U") for col in settings_dict["group_by"]]
+        unique_id = group_arrays[0]
+        for group_array in group_arrays[1:]:
+            unique_id = np.char.add(np.char.add(unique_id, "/"), group_array)
+        nixtla_df["unique_id"] = unique_id
         group_col = "ignore this"
     else:
         group_col = settings_dict["group_by"][0]
@@ -65,9 +183,17 @@ def transform_to_nixtla_df(df, settings_dict, exog_vars=[]):
         # add to dataframe as it is expected by statsforecast
         nixtla_df["unique_id"] = '1'
 
-    columns_to_keep = ["unique_id", "ds", "y"] + exog_vars
-    nixtla_df["ds"] = pd.to_datetime(nixtla_df["ds"])
-    return nixtla_df[columns_to_keep]
+    # building the result from a dict of columns yields a consolidated block layout,
+    # instead of the fragmented one left behind by the per-column assignments above;
+    # categorical ids let downstream groupbys hash integer codes instead of strings
+    result_columns = {
+        "unique_id": nixtla_df["unique_id"].astype("category"),
+        "ds": pd.to_datetime(nixtla_df["ds"]),
+        "y": nixtla_df["y"],
+    }
+    for col in exog_vars:
+        result_columns[col] = nixtla_df[col]
+    return pd.DataFrame(result_columns)
 
 
 def get_results_from_nixtla_df(nixtla_df, model_args):
@@ -76,38 +202,90 @@ def get_results_from_nixtla_df(nixtla_df, model_args):
     This will return the dataframe to the original format supplied by the MindsDB query.
     """
     return_df = nixtla_df.reset_index(drop=True if 'unique_id' in nixtla_df.columns else False)
+    if len(model_args["group_by"]) == 0 or model_args["group_by"] == ["__group_by"]:
+        # the unique_id here is the synthetic '1' added when no real groups exist, so
+        # there is no group column to re-materialize from it
+        return return_df.drop(["unique_id"], axis=1).rename({"ds": model_args["order_by"]}, axis=1)
     if len(model_args["group_by"]) > 0:
         if len(model_args["group_by"]) > 1:
-            for i, group in enumerate(model_args["group_by"]):
-                return_df[group] = return_df["unique_id"].apply(lambda x: x.split("/")[i])
+            # one vectorized split per row instead of one Python-level split per hierarchy level
+            group_parts = return_df["unique_id"].str.split("/", n=len(model_args["group_by"]) - 1, expand=True)
+            group_parts.columns = model_args["group_by"]
+            return_df = pd.concat([return_df, group_parts], axis=1)
         else:
             group_by_col = model_args["group_by"][0]
-            return_df[group_by_col] = return_df["unique_id"]
+            unique_ids = return_df["unique_id"]
+            if isinstance(unique_ids.dtype, pd.CategoricalDtype):
+                # don't leak the internal categorical dtype into user-facing results
+                unique_ids = unique_ids.astype(str)
+            return_df[group_by_col] = unique_ids
 
     return return_df.drop(["unique_id"], axis=1).rename({"ds": model_args["order_by"]}, axis=1)
 
 
 def infer_frequency(df, time_column, default=DEFAULT_FREQUENCY):
     try:  # infer frequency from time column
-        date_series = pd.to_datetime(df.sort_values(by=time_column)[time_column]).unique()
-        inferred_freq = pd.infer_freq(date_series)  # call this first to get e.g. months & other irregular periods right
+        date_series = pd.to_datetime(df[time_column])
+        # work on a contiguous int64 nanosecond view so the dedup/diff/mode steps below
+        # run on native integers, and skip the sort when the column is already ordered
+        timestamps = date_series.to_numpy(dtype="datetime64[ns]").view("i8")
+        if date_series.is_monotonic_increasing and timestamps.size:
+            timestamps = timestamps[np.concatenate(([True], np.diff(timestamps) > 0))]
+        else:
+            timestamps = np.unique(timestamps)
+        date_index = pd.DatetimeIndex(timestamps.view("datetime64[ns]"))
+        inferred_freq = pd.infer_freq(date_index)  # call this first to get e.g. months & other irregular periods right
         if inferred_freq is None:
-            values, counts = np.unique(np.diff(date_series), return_counts=True)
-            delta = values[np.argmax(counts)]
-            inferred_freq = to_offset(pd.to_timedelta(delta)).freqstr
+            diffs = np.diff(timestamps)
+            # mostly-uniform cadences only have a handful of distinct gaps, so an O(N)
+            # hash count finds the mode without the full sort np.unique performs
+            if len(np.unique(diffs[:1024])) < 64:
+                delta = Counter(diffs.tolist()).most_common(1)[0][0]
+            else:
+                values, counts = np.unique(diffs, return_counts=True)
+                delta = values[np.argmax(counts)]
+            inferred_freq = to_offset(pd.to_timedelta(int(delta), unit="ns")).freqstr
     except TypeError:
         inferred_freq = default
     return inferred_freq if inferred_freq is not None else default
 
 
+def _compute_r2_vector(nixtla_results_df):
+    """Computes r2 for every model column in one NumPy pass.
+
+    Returns a tuple (model_cols, r2_array) with the scores in column order.
+    """
+    model_cols = [col for col in nixtla_results_df.columns if col not in ["unique_id", "ds", "y", "cutoff"]]
+    y = nixtla_results_df["y"].to_numpy(np.float64)
+    preds = nixtla_results_df[model_cols].to_numpy(np.float64)
+    # float32 is plenty for ranking models and halves the bytes the reductions move,
+    # but squared residuals of large-magnitude targets overflow its range
+    if preds.size and max(np.abs(y).max(), np.abs(preds).max()) < 1e15:
+        y = y.astype(np.float32)
+        preds = preds.astype(np.float32)
+    # einsum fuses the square-and-reduce, so no squared temporaries are materialised
+    diff = preds - y[:, None]
+    ss_res = np.einsum("ij,ij->j", diff, diff)
+    centered = y - y.mean()
+    ss_tot = np.einsum("i,i->", centered, centered)
+    if ss_tot == 0:
+        # constant target: match sklearn's r2_score, which scores a perfect fit
+        # as 1.0 and anything else as 0.0 instead of dividing by zero
+        return model_cols, np.where(ss_res == 0, 1.0, 0.0)
+    return model_cols, 1 - ss_res / ss_tot
+
+
 def get_model_accuracy_dict(nixtla_results_df, metric=r2_score):
     """Calculates accuracy for each model in the nixtla results df."""
+    if metric is r2_score:
+        # score all model columns in one NumPy pass instead of one sklearn call per column
+        model_cols, r2 = _compute_r2_vector(nixtla_results_df)
+        return dict(zip(model_cols, r2.tolist()))
     accuracy_dict = {}
     for column in nixtla_results_df.columns:
         if column in ["unique_id", "ds", "y", "cutoff"]:
             continue
-        model_error = metric(nixtla_results_df["y"], nixtla_results_df[column])
-        accuracy_dict[column] = model_error
+        accuracy_dict[column] = metric(nixtla_results_df["y"], nixtla_results_df[column])
     return accuracy_dict
 
 
@@ -115,6 +293,12 @@ def get_best_model_from_results_df(nixtla_results_df, metric=r2_score):
     """Gets the best model based, on lowest error, from a results df
     with a column for each nixtla model.
     """
+    if metric is r2_score:
+        model_cols, r2 = _compute_r2_vector(nixtla_results_df)
+        if not model_cols:
+            return None
+        best_idx = int(np.argmax(r2))
+        return model_cols[best_idx] if r2[best_idx] > 0 else None
     best_model, current_accuracy = None, 0
     accuracy_dict = get_model_accuracy_dict(nixtla_results_df, metric)
     for model, accuracy in accuracy_dict.items():
@@ -123,14 +307,82 @@ def get_best_model_from_results_df(nixtla_results_df, metric=r2_score):
     return best_model
 
 
-def spec_hierarchy_from_list(col_list):
-    """Gets the hierarchy spec from the list of hierarchy cols"""
+@lru_cache(maxsize=32)
+def _spec_hierarchy_from_cols(cols_tuple):
     spec = [["Total"]]
-    for i in range(len(col_list)):
-        spec.append(["Total"] + col_list[: i + 1])
+    for i in range(len(cols_tuple)):
+        spec.append(["Total"] + list(cols_tuple[: i + 1]))
     return spec
 
 
+def spec_hierarchy_from_list(col_list):
+    """Gets the hierarchy spec from the list of hierarchy cols.
+
+    The spec only depends on the column names, so it is memoized across the
+    repeated retrain/predict calls that pass the same hierarchy.
+    """
+    return _spec_hierarchy_from_cols(tuple(col_list))
+
+
+@lru_cache(maxsize=8)
+def _hierarchy_structure(level_names, unique_rows):
+    """Builds the sparse summing matrix and tags dict for one hierarchy schema.
+
+    unique_rows holds one tuple of per-level node ids for each bottom-level node,
+    in bottom node order. The structure only depends on the schema, so it is
+    cached across the repeated train/predict calls that share it.
+    """
+    n_bottom = len(unique_rows)
+    bottom_ids = [row[-1] for row in unique_rows]
+    blocks, node_ids, tags = [], [], {}
+    for i, name in enumerate(level_names[:-1]):
+        level_cat = pd.Categorical([row[i] for row in unique_rows])
+        blocks.append(
+            sparse.csr_matrix(
+                (np.ones(n_bottom), (level_cat.codes, np.arange(n_bottom))),
+                shape=(len(level_cat.categories), n_bottom),
+            )
+        )
+        tags[name] = level_cat.categories.to_numpy()
+        node_ids.extend(level_cat.categories)
+    # the bottom-level block of the summing matrix is always the identity
+    blocks.append(sparse.eye(n_bottom, format="csr"))
+    tags[level_names[-1]] = bottom_ids
+    node_ids.extend(bottom_ids)
+    hier_df = pd.DataFrame.sparse.from_spmatrix(
+        sparse.vstack(blocks, format="csr"), index=node_ids, columns=bottom_ids
+    )
+    return hier_df, tags
+
+
+def _aggregate_hierarchy(nixtla_df, spec):
+    """Aggregates a bottom-level frame to every level of the hierarchy spec.
+
+    Replacement for hierarchicalforecast's aggregate() that assembles the summing
+    matrix from category codes as sparse identity-like blocks rather than
+    materialising a dense (nodes x bottom nodes) matrix.
+    """
+    level_names = tuple("/".join(level) for level in spec)
+    node_keys = pd.DataFrame(index=nixtla_df.index)
+    running = nixtla_df[spec[-1][0]].astype(str)
+    node_keys[level_names[0]] = running
+    for i, col in enumerate(spec[-1][1:], start=1):
+        running = running.str.cat(nixtla_df[col].astype(str), sep="/")
+        node_keys[level_names[i]] = running
+
+    level_frames = []
+    for name in level_names:
+        # grouping on categorical node ids hashes integer codes rather than strings
+        level_ids = node_keys[name].astype("category").rename("unique_id")
+        level_y = nixtla_df.groupby([level_ids, "ds"], observed=True)["y"].sum()
+        level_frames.append(level_y.reset_index())
+    agg_df = pd.concat(level_frames, ignore_index=True).set_index("unique_id")
+
+    unique_rows = tuple(sorted(set(node_keys.itertuples(index=False, name=None))))
+    hier_df, hier_dict = _hierarchy_structure(level_names, unique_rows)
+    return agg_df, hier_df, hier_dict
+
+
 def get_hierarchy_from_df(df, model_args):
     """Extracts hierarchy from the raw df, using the provided spec and args.
 
@@ -153,23 +405,55 @@ def get_hierarchy_from_df(df, model_args):
             nixtla_df[col] = nixtla_df[col].astype(str)  # grouping columns need to be string format
         nixtla_df.insert(0, "Total", "total")
 
-        nixtla_df, hier_df, hier_dict = aggregate(nixtla_df, spec)  # returns (nixtla_df, hierarchy_df, hierarchy_dict)
+        # returns (nixtla_df, hierarchy_df, hierarchy_dict)
+        nixtla_df, hier_df, hier_dict = _aggregate_hierarchy(nixtla_df, spec)
         return nixtla_df, hier_df, hier_dict
     else:
         log.logger.warning("HierarchicalForecast is not installed, but `get_hierarchy_from_df` has been called. This should never happen.")  # noqa
 
 
 def reconcile_forecasts(nixtla_df, forecast_df, hierarchy_df, hierarchy_dict):
-    """Reconciles forecast results according to the hierarchy."""
+    """Reconciles forecast results according to the hierarchy.
+
+    This call site only ever needs BottomUp point forecasts, so rather than going
+    through HierarchicalReconciliation (which also allocates the dense weight
+    matrix used for prediction intervals), the bottom-level forecasts are
+    projected through the summing matrix directly: y_tilde = S @ y_hat_bottom.
+    """
     if HierarchicalReconciliation is not None:
-        reconcilers = [DEFAULT_RECONCILER()]
-        hrec = HierarchicalReconciliation(reconcilers=reconcilers)
-        reconciled_df = hrec.reconcile(Y_hat_df=forecast_df, Y_df=nixtla_df, S=hierarchy_df, tags=hierarchy_dict)
+        try:
+            summing_matrix = hierarchy_df.sparse.to_coo().tocsr()
+        except AttributeError:  # hierarchy_df from an older model may be dense
+            summing_matrix = sparse.csr_matrix(hierarchy_df.to_numpy())
+        forecast_index = pd.MultiIndex.from_arrays([forecast_df.index, forecast_df["ds"]])
+        reconciled_df = forecast_df.copy()
+        bottom_forecast_df = forecast_df[forecast_df.index.isin(set(hierarchy_df.columns))].reset_index()
+        for col in forecast_df.columns:
+            if col in ("ds", "y"):  # hierarchicalforecast's reconcile excludes both from model columns
+                continue
+            bottom_wide = (
+                bottom_forecast_df.pivot(index="ds", columns="unique_id", values=col)
+                .reindex(columns=hierarchy_df.columns)
+            )
+            reconciled_wide = pd.DataFrame(
+                summing_matrix @ bottom_wide.to_numpy().T, index=hierarchy_df.index, columns=bottom_wide.index
+            )
+            reconciled_df[f"{col}/BottomUp"] = reconciled_wide.stack().reindex(forecast_index).to_numpy()
         return get_results_from_reconciled_df(reconciled_df, hierarchy_df)
     else:
         log.logger.warning("HierarchicalForecast is not installed, but `reconcile_forecasts` has been called. This should never happen.")  # noqa
 
 
+@lru_cache(maxsize=8)
+def _lowest_level_id_set(ids_tuple):
+    """Memoizes the bottom-level id hash set used to filter reconciled rows.
+
+    The hierarchy columns are stable across inference calls, so the set is only
+    built once per schema rather than on every reconciliation.
+    """
+    return frozenset(ids_tuple)
+
+
 def get_results_from_reconciled_df(reconciled_df, hierarchy_df):
     """Formats the reconciled df into a normal Nixtla results df.
 
@@ -177,15 +461,12 @@ def get_results_from_reconciled_df(reconciled_df, hierarchy_df):
     Then drops rows corresponding to higher level predictions that were not
     in the original dataframe, e.g. the total for each grouping.
     """
-    #  Drop unnecessary columns
-    for col in reconciled_df.columns:
-        if col not in ["ds", "y"]:
-            if "BottomUp" not in col:
-                results_df = reconciled_df.drop(col, axis=1)  # removes original forecast column
-                break
+    #  Keep only the reconciled forecast columns, in one selection
+    columns_to_keep = [col for col in reconciled_df.columns if col in ("ds", "y") or "BottomUp" in col]
+    results_df = reconciled_df[columns_to_keep]
 
     #  Drop higher-level rows
-    lowest_level_ids = hierarchy_df.columns
-    results_df = results_df[results_df.index.isin(lowest_level_ids)]
-    results_df.index = results_df.index.str.replace("total/", "")
+    lowest_level_ids = _lowest_level_id_set(tuple(hierarchy_df.columns))
+    results_df = results_df[results_df.index.map(lowest_level_ids.__contains__)]
+    results_df.index = results_df.index.str.removeprefix("total/")
     return results_df
@@ -1,5 +1,6 @@
 import pandas as pd
 from statsforecast.utils import AirPassengersDF
+import mindsdb.integrations.utilities.time_series_utils as time_series_utils
 from mindsdb.integrations.utilities.time_series_utils import (
     transform_to_nixtla_df,
     get_results_from_nixtla_df,
@@ -80,6 +81,59 @@ def test_statsforecast_df_transformations():
     assert nixtla_df.columns.tolist() == ["unique_id", "ds", "y", "group_col_2", "group_col_3"]
 
 
+def test_resample_fixed_frequency_matches_pandas(monkeypatch):
+    df = create_mock_df(freq="2H")
+    # NaN targets must be skipped by the kernel the way mean() skips them
+    df.loc[df.index[:2], "target_col"] = None
+    df["target_col"] = df["target_col"].astype(float)
+    settings_dict = {"order_by": "time_col", "group_by": ["group_col"], "target": "target_col", "frequency": "H"}
+
+    fast_df = time_series_utils._resample_groups(df, settings_dict, "H")
+    monkeypatch.setattr(time_series_utils, "njit", None)
+    pandas_df = time_series_utils._resample_groups(df, settings_dict, "H")
+
+    sort_cols = ["group_col", "time_col"]
+    pd.testing.assert_frame_equal(
+        fast_df.sort_values(sort_cols).reset_index(drop=True),
+        pandas_df.sort_values(sort_cols).reset_index(drop=True),
+    )
+
+
+def test_transform_with_nan_group_keys():
+    df = create_mock_df(freq="H")
+    df.loc[df.index[:3], "group_col"] = None
+    settings_dict = {"order_by": "time_col", "group_by": ["group_col"], "target": "target_col", "frequency": "H"}
+
+    nixtla_df = transform_to_nixtla_df(df, settings_dict)
+
+    # rows whose group key is NaN are silently dropped, like the pandas groupby does
+    assert not nixtla_df["unique_id"].isna().any()
+    assert set(nixtla_df["unique_id"]) == {"a", "b"}
+    assert len(nixtla_df) == len(df) - 3
+
+
+def test_transform_fast_path_for_nixtla_frames():
+    frames = [
+        pd.DataFrame({"unique_id": uid, "ds": pd.date_range("1/1/2020", periods=5, freq="D"), "y": range(5)})
+        for uid in ["a", "b"]
+    ]
+    df = pd.concat(frames).reset_index(drop=True)
+    settings_dict = {"order_by": "ds", "group_by": ["unique_id"], "target": "y", "frequency": "D"}
+
+    # already-regular Nixtla frames skip the pipeline but still get categorical ids
+    nixtla_df = transform_to_nixtla_df(df, settings_dict)
+    assert len(nixtla_df) == len(df)
+    assert nixtla_df["ds"].tolist() == df["ds"].tolist()
+    assert str(nixtla_df["unique_id"].dtype) == "category"
+
+    # a series with an interior gap must go through the resample pipeline,
+    # which emits a NaN bucket for the missing step
+    gapped_df = df.drop(index=7).reset_index(drop=True)
+    gapped_nixtla_df = transform_to_nixtla_df(gapped_df, settings_dict)
+    assert len(gapped_nixtla_df) == len(df)
+    assert gapped_nixtla_df["y"].isna().sum() == 1
+
+
 def test_get_best_model_from_results_df():
     nixtla_df = AirPassengersDF.copy()
     nixtla_df["AutoARIMA"] = nixtla_df["y"] + 1